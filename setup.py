@@ -5,6 +5,7 @@ setup(
     version="0.1",
     package_dir={"": "src"},
     packages=find_packages(where="src"),
+    package_data={"app": ["migrations/*.sql"]},
     install_requires=[
         "fastapi",
         "uvicorn",
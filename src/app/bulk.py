@@ -0,0 +1,85 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import asyncpg
+
+from src.app.shortcodes import ShortCodeAllocator, AliasTaken, ShortCodeExhausted
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "100000"))
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+BULK_INSERT_SQL = """
+    INSERT INTO links (original_url, short_code, custom_alias, expires_at, user_id)
+    SELECT u.original_url, u.short_code, u.custom_alias, u.expires_at, $5
+    FROM unnest($1::text[], $2::text[], $3::text[], $4::timestamp[])
+        AS u(original_url, short_code, custom_alias, expires_at)
+    ON CONFLICT (short_code) DO NOTHING
+    RETURNING short_code
+"""
+
+# (индекс во входных данных, URL, алиас, срок действия)
+BulkItem = Tuple[int, str, Optional[str], Optional[datetime]]
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Разбирает тело запроса: JSON-массив или NDJSON (по объекту на строку)"""
+    if content_type.split(";")[0].strip() in NDJSON_MEDIA_TYPES:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    items = json.loads(body or b"[]")
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array of links")
+    return items
+
+
+async def insert_links_bulk(
+    conn: asyncpg.Connection,
+    allocator: ShortCodeAllocator,
+    items: List[BulkItem],
+    user_id: Optional[int],
+) -> Dict[int, Union[str, Exception]]:
+    """Вставляет пачку ссылок одним INSERT ... SELECT FROM unnest(...) на попытку.
+
+    Коды для элементов без алиаса генерируются заранее; элементы, чей код
+    столкнулся с существующим, повторяются с новыми кодами (не более
+    allocator.max_attempts раз). Возвращает индекс -> короткий код или ошибку.
+    """
+    results: Dict[int, Union[str, Exception]] = {}
+    pending = items
+    for _ in range(allocator.max_attempts):
+        if not pending:
+            break
+        codes = [alias or allocator.generate() for _, _, alias, _ in pending]
+        rows = await conn.fetch(
+            BULK_INSERT_SQL,
+            [url for _, url, _, _ in pending],
+            codes,
+            [alias for _, _, alias, _ in pending],
+            [expires_at for _, _, _, expires_at in pending],
+            user_id,
+        )
+        inserted = {row["short_code"] for row in rows}
+
+        retry = []
+        for item, code in zip(pending, codes):
+            index, _, alias, _ = item
+            if code in inserted:
+                # Дубликаты внутри пачки: код достается первому вхождению
+                inserted.discard(code)
+                results[index] = code
+                if not alias:
+                    allocator.record(False)
+            elif alias:
+                results[index] = AliasTaken(alias)
+            else:
+                allocator.record(True)
+                retry.append(item)
+        pending = retry
+
+    for index, _, _, _ in pending:
+        allocator.exhausted += 1
+        results[index] = ShortCodeExhausted()
+    return results
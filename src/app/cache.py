@@ -0,0 +1,153 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+
+REDIRECT_CACHE_SIZE = int(os.getenv("REDIRECT_CACHE_SIZE", "10000"))
+REDIRECT_CACHE_TTL = float(os.getenv("REDIRECT_CACHE_TTL", "300"))
+REDIRECT_CACHE_NEGATIVE_TTL = float(os.getenv("REDIRECT_CACHE_NEGATIVE_TTL", "30"))
+
+# Маркер закешированного отрицательного результата (короткого кода нет в БД)
+NOT_FOUND = object()
+_MISSING = object()
+
+
+class TTLCache:
+    """Ограниченный по размеру LRU-словарь, записи которого живут не дольше ttl секунд"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        deadline, value = item
+        if deadline < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CachedLink(NamedTuple):
+    target_url: str
+    expires_at: Optional[datetime]
+
+
+class RedirectCache:
+    """Двухуровневый кеш редиректов: локальный LRU/TTL и (опционально) общий Redis.
+
+    Ключ - короткий код, значение - нормализованный целевой URL и срок действия.
+    Отсутствующие коды тоже кешируются (с меньшим TTL), чтобы повторные запросы
+    к несуществующим ссылкам не доходили до БД. Инвалидация удаляет запись из
+    обоих уровней; локальные кеши других воркеров догоняют не позже чем через TTL.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = REDIRECT_CACHE_SIZE,
+        ttl: float = REDIRECT_CACHE_TTL,
+        negative_ttl: float = REDIRECT_CACHE_NEGATIVE_TTL,
+        redis=None,
+        prefix: str = "redirect:",
+    ):
+        self.local = TTLCache(maxsize, ttl)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.redis = redis
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    async def get(self, short_code: str):
+        """Возвращает CachedLink, NOT_FOUND или None (промах)"""
+        entry = self.local.get(short_code)
+        if entry is None and self.redis is not None:
+            entry = await self._redis_get(short_code)
+        if entry is None:
+            self.misses += 1
+        elif entry is NOT_FOUND:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def set(self, short_code: str, link: CachedLink):
+        self.local.set(short_code, link)
+        if self.redis is not None:
+            payload = json.dumps({
+                "u": link.target_url,
+                "e": link.expires_at.isoformat() if link.expires_at else None,
+            })
+            await self._redis_call(self.redis.set, self.prefix + short_code, payload, ex=int(self.ttl))
+
+    async def set_missing(self, short_code: str):
+        self.local.set(short_code, NOT_FOUND, ttl=self.negative_ttl)
+        if self.redis is not None:
+            await self._redis_call(self.redis.set, self.prefix + short_code, "", ex=int(self.negative_ttl))
+
+    async def invalidate(self, short_code: str):
+        self.local.pop(short_code)
+        if self.redis is not None:
+            await self._redis_call(self.redis.delete, self.prefix + short_code)
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.local),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+        }
+
+    async def _redis_get(self, short_code: str):
+        raw = await self._redis_call(self.redis.get, self.prefix + short_code)
+        if raw is None:
+            return None
+        if raw in (b"", ""):
+            entry = NOT_FOUND
+            ttl = self.negative_ttl
+        else:
+            data = json.loads(raw)
+            entry = CachedLink(
+                data["u"],
+                datetime.fromisoformat(data["e"]) if data["e"] else None,
+            )
+            ttl = None
+        self.local.set(short_code, entry, ttl=ttl)
+        return entry
+
+    async def _redis_call(self, method, *args, **kwargs):
+        # Общий уровень кеша не должен ронять редиректы: при ошибке Redis работаем с БД
+        try:
+            return await method(*args, **kwargs)
+        except Exception as e:
+            print(f"Redirect cache Redis error: {e}")
+            return None
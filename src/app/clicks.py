@@ -0,0 +1,91 @@
+import asyncio
+import os
+from typing import Dict, Optional
+
+from src.app.database import get_pool
+from src.app.queries import queries, FLUSH_CLICKS
+
+CLICK_FLUSH_INTERVAL = float(os.getenv("CLICK_FLUSH_INTERVAL", "1"))
+CLICK_BUFFER_MAX_SIZE = int(os.getenv("CLICK_BUFFER_MAX_SIZE", "10000"))
+
+
+class ClickCounter:
+    """Буфер приращений счетчика кликов с периодической пакетной записью в БД.
+
+    Редирект только увеличивает значение в словаре; фоновая задача раз в
+    flush_interval секунд (или при заполнении буфера до max_size кодов)
+    записывает все накопленные приращения одним UPDATE ... FROM unnest(...).
+    """
+
+    def __init__(self, flush_interval: float = CLICK_FLUSH_INTERVAL, max_size: int = CLICK_BUFFER_MAX_SIZE):
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._pending: Dict[str, int] = {}
+        self._flushing: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._overflow_task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.flushed_total = 0
+
+    def add(self, short_code: str, count: int = 1):
+        self._pending[short_code] = self._pending.get(short_code, 0) + count
+        if len(self._pending) >= self.max_size and (self._overflow_task is None or self._overflow_task.done()):
+            self._overflow_task = asyncio.get_event_loop().create_task(self.flush())
+
+    def pending(self, short_code: str) -> int:
+        """Клики, которые еще не записаны в БД"""
+        return self._pending.get(short_code, 0) + self._flushing.get(short_code, 0)
+
+    def discard(self, short_code: str):
+        """Забывает незаписанные клики (ссылка удалена или создана заново)"""
+        self._pending.pop(short_code, None)
+
+    async def flush(self) -> int:
+        """Записывает накопленные приращения в БД, возвращает число обновленных кодов"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._pending:
+                return 0
+            self._flushing, self._pending = self._pending, {}
+            codes = list(self._flushing)
+            deltas = [self._flushing[code] for code in codes]
+            try:
+                pool = await get_pool()
+                async with pool.acquire() as conn:
+                    await queries.fetch(conn, FLUSH_CLICKS, codes, deltas)
+            except Exception:
+                # Возвращаем приращения в буфер, чтобы не потерять клики
+                for code, delta in self._flushing.items():
+                    self._pending[code] = self._pending.get(code, 0) + delta
+                raise
+            finally:
+                self._flushing = {}
+            self.flushed_total += len(codes)
+            return len(codes)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Click flush failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую запись и сбрасывает остаток буфера в БД"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._overflow_task is not None:
+            await asyncio.gather(self._overflow_task, return_exceptions=True)
+            self._overflow_task = None
+        await self.flush()
@@ -1,20 +1,112 @@
+import asyncio
+from contextlib import asynccontextmanager
 import asyncpg
 from fastapi import HTTPException
 import os
+from typing import Optional
 
-async def get_connection():
+from src.app.queries import queries
+
+# Параметры пула соединений (переопределяются переменными окружения)
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+POOL_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "5"))
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock: Optional[asyncio.Lock] = None
+
+
+def connection_params() -> dict:
+    """Параметры подключения к БД из окружения"""
+    return {
+        "user": os.getenv("DB_USER", "test_user"),
+        "password": os.getenv("DB_PASSWORD", "test_password"),
+        "database": os.getenv("DB_NAME", "test_db"),
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": os.getenv("DB_PORT", "5432"),
+    }
+
+
+async def create_pool() -> asyncpg.Pool:
+    """Создает пул соединений с параметрами из окружения"""
+    return await asyncpg.create_pool(
+        **connection_params(),
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        statement_cache_size=POOL_STATEMENT_CACHE_SIZE,
+        # Запросы горячего пути подготавливаются один раз на каждое соединение пула
+        init=queries.prepare_all,
+    )
+
+
+async def get_pool() -> asyncpg.Pool:
+    """Возвращает общий пул приложения, создавая его при первом обращении"""
+    global _pool, _pool_lock
+    if _pool is not None:
+        return _pool
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = await create_pool()
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Database connection error: {str(e)}"
+                )
+    return _pool
+
+
+async def close_pool():
+    """Закрывает общий пул (вызывается при остановке приложения)"""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+
+@asynccontextmanager
+async def acquire():
+    """Берет соединение из общего пула на время блока async with"""
+    pool = await get_pool()
     try:
-        conn = await asyncpg.connect(
-            user=os.getenv("DB_USER", "test_user"),
-            password=os.getenv("DB_PASSWORD", "test_password"),
-            database=os.getenv("DB_NAME", "test_db"),
-            host=os.getenv("DB_HOST", "localhost"),
-            port=os.getenv("DB_PORT", "5432")
+        conn = await pool.acquire(timeout=POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Database pool exhausted, try again later"
         )
-        return conn
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Database connection error: {str(e)}"
         )
-        
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+
+async def get_connection():
+    """Зависимость FastAPI: берет соединение из пула и возвращает его после запроса"""
+    async with acquire() as conn:
+        yield conn
+
+
+def pool_stats() -> dict:
+    """Текущая загрузка пула: сколько соединений открыто и сколько свободно"""
+    if _pool is None:
+        return {"initialized": False, "min_size": POOL_MIN_SIZE, "max_size": POOL_MAX_SIZE}
+    size = _pool.get_size()
+    idle = _pool.get_idle_size()
+    return {
+        "initialized": True,
+        "min_size": _pool.get_min_size(),
+        "max_size": _pool.get_max_size(),
+        "size": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "saturation": (size - idle) / _pool.get_max_size(),
+    }
@@ -1,16 +1,30 @@
-from fastapi import FastAPI, HTTPException, Depends, Request, Response, status, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
 from pydantic import BaseModel, validator
 from asyncpg.exceptions import UniqueViolationError
 from datetime import datetime
-import secrets
 #from database import get_connection
-from src.app.database import get_connection  # Стало
+from src.app.database import get_connection, get_pool, close_pool, pool_stats, acquire  # Стало
+from src.app.cache import RedirectCache, CachedLink, NOT_FOUND
+from src.app.redis_pool import get_redis, close_redis
+from src.app.clicks import ClickCounter
+from src.app.sweeper import CleanupSweeper
+from src.app.sessions import SessionStore
+from src.app.security import PasswordHasher, HasherBusy
+from src.app.shortcodes import ShortCodeAllocator, AliasTaken, ShortCodeExhausted
+from src.app.migrate import migrate_database, RUN_MIGRATIONS_ON_STARTUP
+from src.app.queries import (
+    queries, REDIRECT_LOOKUP, LINK_STATS, LINK_OWNED, UPDATE_LINK, DELETE_LINK,
+    USER_BY_ID, USER_BY_EMAIL, USER_EMAIL_EXISTS, INSERT_USER
+)
+from src.app.pagination import (
+    encode_cursor, decode_cursor, parse_cursor_timestamp, stream_ndjson, PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
+)
+from src.app.bulk import parse_bulk_body, insert_links_bulk, BULK_CHUNK_SIZE, BULK_MAX_ITEMS
 from typing import Optional, Union
-import redis
 import traceback
-from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
+import json
+from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse, StreamingResponse
 from passlib.context import CryptContext
-import uuid
 from fastapi.middleware.cors import CORSMiddleware
 import asyncpg
 from urllib.parse import urlparse, urlunparse 
@@ -75,48 +89,64 @@ async def validate_and_fix_url(url: str) -> str:
     return urlunparse(parsed)
 
 
-# Redis setup
-try:
-    redis_client = redis.Redis(host="localhost", port=6379, db=0)
-    redis_client.ping()
-except redis.ConnectionError:
-    redis_client = None
-    print("Warning: Redis is not available. Using in-memory sessions.")
-    sessions = {}
+# Сессии: Redis (подключается при старте) или ограниченное in-memory хранилище
+session_store = SessionStore()
+
+# Кеш редиректов: short_code -> нормализованный URL и срок действия
+redirect_cache = RedirectCache()
+
+# Выделение коротких кодов со счетчиками коллизий
+code_allocator = ShortCodeAllocator()
+
+# Буфер кликов, периодически записываемый в БД одним запросом
+click_counter = ClickCounter()
 
 # Auth utils
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt выполняется в пуле потоков, а не в event loop
+password_hasher = PasswordHasher(pwd_context)
 
-async def get_current_user(request: Request, conn=Depends(get_connection)) -> Optional[dict]:
+
+def too_many_auth_requests() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests, try again later",
+        headers={"Retry-After": "1"}
+    )
+
+async def get_current_user(request: Request) -> Optional[dict]:
     """Получает текущего пользователя по session_id из cookies"""
     session_id = request.cookies.get("session_id")
     if not session_id:
         return None
+
+    user = session_store.cached_user(session_id)
+    if user:
+        return user
     
     try:
         # Получаем user_id из Redis или памяти
-        if redis_client:
-            user_id = redis_client.get(f"session:{session_id}")
-        else:
-            user_id = sessions.get(session_id)
+        user_id = await session_store.get_user_id(session_id)
         
         if not user_id:
             return None
             
         # Получаем данные пользователя из БД
-        user = await conn.fetchrow(
-            "SELECT id, email, created_at FROM users WHERE id = $1", 
-            int(user_id)
-        )  
-        
-        return dict(user) if user else None
+        async with acquire() as conn:
+            user = await queries.fetchrow(conn, USER_BY_ID, user_id)
+        if not user:
+            return None
+
+        user = dict(user)
+        session_store.cache_user(session_id, user)
+        return user
         
     except Exception as e:
         print(f"Error getting current user: {e}")
         return None
 
-async def get_authenticated_user(request: Request, conn=Depends(get_connection)) -> dict:
-    user = await get_current_user(request, conn)
+async def get_authenticated_user(request: Request) -> dict:
+    user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     return user
@@ -124,53 +154,82 @@ async def get_authenticated_user(request: Request, conn=Depends(get_connection))
 
 
 
-# метод для очистки неиспользованных ссылок, которые заведены более чем 5 дней назад и имеюю 0 кликов (0 редиректов)
-async def cleanup_unused_links(conn: asyncpg.Connection):
-    """Удаляет ссылки, созданные более 5 дней назад с 0 кликов"""
-    await conn.execute(
-        "DELETE FROM links WHERE created_at < NOW() - INTERVAL '5 days' AND clicks = 0"
-    )
+async def invalidate_links(short_codes):
+    for short_code in short_codes:
+        await redirect_cache.invalidate(short_code.lower())
+
+
+# Фоновая очистка неиспользованных ссылок (вне пути обработки запросов).
+# Перед проходом сбрасываем буфер кликов, чтобы не удалить ссылки с незаписанными переходами
+cleanup_sweeper = CleanupSweeper(before_run=click_counter.flush, on_deleted=invalidate_links)
 
 
 @app.on_event("startup")
 async def startup_event():
-    # При старте приложения создаем соединение и выполняем очистку
-    conn = await get_connection()
-    await cleanup_unused_links(conn)
-    await conn.close()
+    # При старте приложения обновляем схему (до создания пула, чтобы соединения
+    # подготавливали запросы уже по новой схеме) и запускаем фоновые задачи
+    if RUN_MIGRATIONS_ON_STARTUP:
+        await migrate_database()
+    await get_pool()
+    redis_client = await get_redis()
+    redirect_cache.redis = redis_client
+    session_store.redis = redis_client
+    click_counter.start()
+    cleanup_sweeper.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await cleanup_sweeper.stop()
+    await click_counter.stop()
+    redirect_cache.redis = None
+    session_store.redis = None
+    await close_redis()
+    await close_pool()
 
 
 # Auth endpoints
 @app.post("/register")
 async def register(user: UserCreate, conn=Depends(get_connection)):
-    if await conn.fetchrow("SELECT 1 FROM users WHERE email = $1", user.email):
+    if await queries.fetchrow(conn, USER_EMAIL_EXISTS, user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    await conn.execute(
-        "INSERT INTO users (email, password_hash, created_at) VALUES ($1, $2, $3)",
+    try:
+        password_hash = await password_hasher.hash(user.password)
+    except HasherBusy:
+        raise too_many_auth_requests()
+
+    await queries.fetch(
+        conn,
+        INSERT_USER,
         user.email,
-        pwd_context.hash(user.password),
+        password_hash,
         datetime.now()
     )
     return {"message": "User registered successfully"}
 
 @app.post("/login")
 async def login(user: UserLogin, response: Response, conn=Depends(get_connection)):
-    db_user = await conn.fetchrow("SELECT * FROM users WHERE email = $1", user.email)
-    if not db_user or not pwd_context.verify(user.password, db_user["password_hash"]):
+    db_user = await queries.fetchrow(conn, USER_BY_EMAIL, user.email)
+    try:
+        valid = bool(db_user) and await password_hasher.verify(user.password, db_user["password_hash"])
+    except HasherBusy:
+        raise too_many_auth_requests()
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
-    session_id = str(uuid.uuid4())
-    if redis_client:
-        redis_client.set(f"session:{session_id}", db_user["id"], ex=86400)
-    else:
-        sessions[session_id] = db_user["id"]
+    session_id = await session_store.create(db_user["id"])
+    session_store.cache_user(session_id, {
+        "id": db_user["id"],
+        "email": db_user["email"],
+        "created_at": db_user["created_at"]
+    })
     
     response.set_cookie(
         key="session_id",
         value=session_id,
         httponly=True,
-        max_age=86400,
+        max_age=session_store.ttl,
         secure=False
     )
     return {"message": "Logged in successfully"}
@@ -179,10 +238,7 @@ async def login(user: UserLogin, response: Response, conn=Depends(get_connection
 async def logout(response: Response, request: Request):
     session_id = request.cookies.get("session_id")
     if session_id:
-        if redis_client:
-            redis_client.delete(f"session:{session_id}")
-        else:
-            sessions.pop(session_id, None)
+        await session_store.delete(session_id)
     response.delete_cookie("session_id")
     return {"message": "Logged out successfully"}
 
@@ -208,7 +264,7 @@ async def create_short_link(
     conn=Depends(get_connection),
     current_user: Optional[dict] = Depends(get_current_user)
 ):
-    """Создание короткой ссылки с автоматической очисткой неиспользованных"""
+    """Создание короткой ссылки"""
     try:
         # Валидируем URL
         validated_url = await validate_and_fix_url(link.original_url)
@@ -218,69 +274,131 @@ async def create_short_link(
             detail=str(e)
         )
 
-    # Остальной код функции без изменений
-    await cleanup_unused_links(conn)
-    short_code = link.custom_alias or secrets.token_urlsafe(6)
-    
-    if await conn.fetchrow("SELECT 1 FROM links WHERE short_code = $1", short_code):
+    # Проверка занятости и вставка - один запрос INSERT ... ON CONFLICT DO NOTHING
+    try:
+        short_code = await code_allocator.insert(
+            conn,
+            validated_url,  # Используем validated_url вместо link.original_url
+            link.custom_alias,
+            link.expires_at,
+            current_user["id"] if current_user else None
+        )
+    except AliasTaken:
         raise HTTPException(status_code=400, detail="Alias already exists")
-    
-    await conn.execute(
-        """
-        INSERT INTO links (
-            original_url, 
-            short_code, 
-            custom_alias,
-            expires_at, 
-            user_id
-        ) VALUES ($1, $2, $3, $4, $5)
-        """,
-        validated_url,  # Используем validated_url вместо link.original_url
-        short_code,
-        link.custom_alias,
-        link.expires_at,
-        current_user["id"] if current_user else None
-    )
+    except ShortCodeExhausted:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not allocate a short code, try again later"
+        )
+    # Код мог быть закеширован как несуществующий
+    await redirect_cache.invalidate(short_code.lower())
+    click_counter.discard(short_code)
     
     return {
         "short_url": f"{request.base_url}{short_code}",
         "short_code": short_code
     }
 
+
+@app.post("/links/shorten/bulk")
+async def create_short_links_bulk(
+    request: Request,
+    current_user: Optional[dict] = Depends(get_current_user)
+):
+    """Массовое создание коротких ссылок.
+
+    Принимает JSON-массив или NDJSON (Content-Type: application/x-ndjson)
+    объектов LinkCreate. Ответ - NDJSON, по строке на каждый элемент:
+    {"index", "short_code", "short_url"} или {"index", "error"}.
+    """
+    try:
+        raw_items = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bulk payload: {e}")
+    if len(raw_items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many links in one request (max {BULK_MAX_ITEMS})"
+        )
+
+    user_id = current_user["id"] if current_user else None
+    base_url = str(request.base_url)
+
+    async def results():
+        for start in range(0, len(raw_items), BULK_CHUNK_SIZE):
+            chunk = raw_items[start:start + BULK_CHUNK_SIZE]
+            outcome = {}
+            valid = []
+            for index, raw in enumerate(chunk, start):
+                try:
+                    link = LinkCreate.parse_obj(raw)
+                    validated_url = await validate_and_fix_url(link.original_url)
+                except ValueError as e:
+                    outcome[index] = e
+                    continue
+                valid.append((index, validated_url, link.custom_alias, link.expires_at))
+
+            if valid:
+                async with acquire() as conn:
+                    outcome.update(await insert_links_bulk(conn, code_allocator, valid, user_id))
+
+            for index, _, alias, _ in valid:
+                if alias and isinstance(outcome[index], str):
+                    await redirect_cache.invalidate(alias.lower())
+                    click_counter.discard(alias)
+
+            lines = []
+            for index in range(start, start + len(chunk)):
+                result = outcome[index]
+                if isinstance(result, str):
+                    item = {"index": index, "short_code": result, "short_url": f"{base_url}{result}"}
+                elif isinstance(result, AliasTaken):
+                    item = {"index": index, "error": "Alias already exists"}
+                elif isinstance(result, ShortCodeExhausted):
+                    item = {"index": index, "error": "Could not allocate a short code"}
+                else:
+                    item = {"index": index, "error": str(result)}
+                lines.append(json.dumps(item))
+            yield "\n".join(lines) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
     
 @app.get("/{short_code}")
 async def universal_redirect(
     short_code: str,
-    request: Request,
-    conn: asyncpg.Connection = Depends(get_connection),
-    background_tasks: BackgroundTasks = None
+    request: Request
 ):
     try:
-        if background_tasks:
-            background_tasks.add_task(cleanup_unused_links, conn)
-        
-        link = await conn.fetchrow(
-            "SELECT original_url, expires_at FROM links WHERE short_code = $1",
-            short_code.lower()
-        )
-        
-        if not link:
+        cached = await redirect_cache.get(short_code.lower())
+        if cached is NOT_FOUND:
             raise HTTPException(status_code=404, detail="Short URL not found")
 
-        # 2. Проверяем URL
-        target_url = link["original_url"].strip()
-        if not target_url.startswith(('http://', 'https://')):
-            target_url = f'https://{target_url}'
+        if cached is None:
+            # Соединение берем из пула только при промахе кеша
+            async with acquire() as conn:
+                link = await queries.fetchrow(conn, REDIRECT_LOOKUP, short_code.lower())
+
+            if not link:
+                await redirect_cache.set_missing(short_code.lower())
+                raise HTTPException(status_code=404, detail="Short URL not found")
+
+            # 2. Проверяем URL
+            target_url = link["original_url"].strip()
+            if not target_url.startswith(('http://', 'https://')):
+                target_url = f'https://{target_url}'
+
+            cached = CachedLink(target_url, link["expires_at"])
+            await redirect_cache.set(short_code.lower(), cached)
+
+        target_url = cached.target_url
 
         # 3. Проверка срока действия
-        if link["expires_at"] and link["expires_at"] < datetime.now():
+        if cached.expires_at and cached.expires_at < datetime.now():
             raise HTTPException(status_code=410, detail="This short URL has expired")
 
-        # 4. Обновляем статистику
-        await conn.execute(
-            "UPDATE links SET clicks = clicks + 1 WHERE short_code = $1",
-            short_code
-        )
+        # 4. Обновляем статистику (запись в БД - пакетами в фоне)
+        click_counter.add(short_code.lower())
 
         # 5. Определяем тип клиента
         user_agent = request.headers.get("user-agent", "").lower()
@@ -301,19 +419,54 @@ async def universal_redirect(
         raise HTTPException(status_code=500, detail=str(e))
 
 # Other endpoints
+SEARCH_LINKS_SQL = """
+    SELECT * FROM links
+    WHERE original_url = $1 AND id > $2
+    ORDER BY id
+"""
+
 @app.get("/links/search")
-async def search_link(original_url: str, conn=Depends(get_connection)):
-    links = await conn.fetch("SELECT * FROM links WHERE original_url = $1", original_url)
-    if not links:
+async def search_link(
+    original_url: str,
+    response: Response,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    after: Optional[str] = None,
+    stream: bool = False
+):
+    """Поиск ссылок по оригинальному URL.
+
+    Постраничная выдача по id: курсор следующей страницы - в заголовке
+    X-Next-Cursor, передается обратно параметром after. С stream=true все
+    найденные ссылки отдаются потоком NDJSON.
+    """
+    try:
+        after_id = decode_cursor(after)[0] if after else 0
+    except (ValueError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(SEARCH_LINKS_SQL, original_url, after_id),
+            media_type="application/x-ndjson"
+        )
+
+    async with acquire() as conn:
+        links = await conn.fetch(SEARCH_LINKS_SQL + " LIMIT $3", original_url, after_id, limit)
+    if not links and not after:
         raise HTTPException(status_code=404, detail="No links found")
+    if len(links) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(links[-1]["id"])
     return [dict(link) for link in links]
 
 @app.get("/links/{short_code}/stats")
 async def get_link_stats(short_code: str, conn=Depends(get_connection)):
-    link = await conn.fetchrow("SELECT * FROM links WHERE short_code = $1", short_code)
+    link = await queries.fetchrow(conn, LINK_STATS, short_code)
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
-    return dict(link)
+    stats = dict(link)
+    # Добавляем клики, еще не записанные в БД
+    stats["clicks"] = (stats["clicks"] or 0) + click_counter.pending(short_code)
+    return stats
 
 @app.delete("/links/{short_code}")
 async def delete_link(
@@ -321,15 +474,13 @@ async def delete_link(
     conn=Depends(get_connection),
     current_user: dict = Depends(get_authenticated_user)
 ):
-    existing_link = await conn.fetchrow(
-        "SELECT 1 FROM links WHERE short_code = $1 AND user_id = $2",
-        short_code,
-        current_user["id"]
-    )
+    existing_link = await queries.fetchrow(conn, LINK_OWNED, short_code, current_user["id"])
     if not existing_link:
         raise HTTPException(status_code=404, detail="Link not found or access denied")
     
-    await conn.execute("DELETE FROM links WHERE short_code = $1", short_code)
+    await queries.fetch(conn, DELETE_LINK, short_code)
+    await redirect_cache.invalidate(short_code.lower())
+    click_counter.discard(short_code)
     return {"message": "Link deleted successfully"}
 
 @app.put("/links/{short_code}")
@@ -339,26 +490,20 @@ async def update_link(
     conn=Depends(get_connection),
     current_user: dict = Depends(get_authenticated_user)
 ):
-    existing_link = await conn.fetchrow(
-        "SELECT 1 FROM links WHERE short_code = $1 AND user_id = $2",
-        short_code,
-        current_user["id"]
-    )
+    existing_link = await queries.fetchrow(conn, LINK_OWNED, short_code, current_user["id"])
     if not existing_link:
         raise HTTPException(status_code=404, detail="Link not found or access denied")
 
     try:
-        await conn.execute(
-            """
-            UPDATE links
-            SET original_url = $1, custom_alias = $2, expires_at = $3
-            WHERE short_code = $4
-            """,
+        await queries.fetch(
+            conn,
+            UPDATE_LINK,
             link.original_url,
             link.custom_alias,
             link.expires_at,
             short_code
         )
+        await redirect_cache.invalidate(short_code.lower())
         return {"message": "Link updated successfully"}
     except UniqueViolationError:
         raise HTTPException(status_code=400, detail="This custom alias is already in use")
@@ -380,11 +525,32 @@ def read_root():
     return {"message": "Welcome to the URL shortener service!"}
 
 
+EXPIRED_LINKS_SQL = """
+    SELECT id, original_url, short_code, expires_at, clicks, created_at
+    FROM links
+    WHERE expires_at < NOW()
+    ORDER BY expires_at DESC, id DESC
+"""
+
+EXPIRED_LINKS_AFTER_SQL = """
+    SELECT id, original_url, short_code, expires_at, clicks, created_at
+    FROM links
+    WHERE expires_at < NOW() AND (expires_at, id) < ($1, $2)
+    ORDER BY expires_at DESC, id DESC
+"""
+
 @app.get("/links/expired", tags=["links"])
 async def get_expired_links(
-    conn: asyncpg.Connection = Depends(get_connection)
+    response: Response,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    after: Optional[str] = None,
+    stream: bool = False
 ):
     """Получение списка всех истекших ссылок (доступно всем)
+
+    Постраничная выдача (keyset по expires_at, id): курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor и передается параметром after.
+    С stream=true весь список отдается потоком NDJSON.
     
     Возвращает:
     - id: ID ссылки
@@ -395,24 +561,30 @@ async def get_expired_links(
     - created_at: Дата создания
     """
     try:
-        expired_links = await conn.fetch(
-            """
-            SELECT id, original_url, short_code, expires_at, clicks, created_at
-            FROM links
-            WHERE expires_at < NOW()
-            ORDER BY expires_at DESC
-            """
-        )
-        return [dict(link) for link in expired_links]
-    
+        args = []
+        if after:
+            expires_at, link_id = decode_cursor(after)
+            args = [parse_cursor_timestamp(expires_at), link_id]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    query = EXPIRED_LINKS_AFTER_SQL if args else EXPIRED_LINKS_SQL
+
+    if stream:
+        return StreamingResponse(stream_ndjson(query, *args), media_type="application/x-ndjson")
+
+    try:
+        async with acquire() as conn:
+            expired_links = await conn.fetch(f"{query} LIMIT ${len(args) + 1}", *args, limit)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching expired links: {str(e)}"
         )
 
-
-
+    if len(expired_links) == limit:
+        last = expired_links[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last["expires_at"], last["id"])
+    return [dict(link) for link in expired_links]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+from bisect import bisect_left
+from typing import Sequence
+
+# Границы корзин гистограмм задержек, в секундах
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами.
+
+    Обновляется только из event loop, поэтому обходится без блокировок:
+    observe - это bisect и пара сложений.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """Накопленные счетчики по корзинам (последняя - +Inf)"""
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.cumulative())),
+        }
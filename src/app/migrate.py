@@ -0,0 +1,84 @@
+"""Версионные миграции схемы БД.
+
+Миграции - файлы migrations/NNNN_name.sql, применяются по возрастанию номера,
+каждая в своей транзакции. Примененные версии хранятся в schema_migrations.
+Запуск из командной строки: python -m src.app.migrate
+"""
+import asyncio
+import os
+import re
+from pathlib import Path
+from typing import List, Tuple
+
+import asyncpg
+
+from src.app.database import connection_params
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# Ключ advisory-блокировки: миграции одновременно применяет только один процесс
+MIGRATIONS_LOCK_KEY = int(os.getenv("MIGRATIONS_LOCK_KEY", "5502"))
+# Применять миграции при старте приложения
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("DB_RUN_MIGRATIONS", "1") == "1"
+
+_MIGRATION_NAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def load_migrations() -> List[Tuple[int, str, str]]:
+    """Возвращает список (версия, имя, SQL), отсортированный по версии"""
+    migrations = []
+    for path in MIGRATIONS_DIR.iterdir():
+        match = _MIGRATION_NAME.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path.read_text(encoding="utf-8")))
+    return sorted(migrations)
+
+
+async def apply_migrations(conn: asyncpg.Connection) -> List[int]:
+    """Применяет недостающие миграции, возвращает номера примененных"""
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK_KEY)
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        applied = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+
+        newly_applied = []
+        for version, name, sql in load_migrations():
+            if version in applied:
+                continue
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+                    version,
+                    name
+                )
+            newly_applied.append(version)
+        return newly_applied
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK_KEY)
+
+
+async def migrate_database() -> List[int]:
+    """Применяет миграции через отдельное соединение (до создания пула приложения)"""
+    conn = await asyncpg.connect(**connection_params())
+    try:
+        return await apply_migrations(conn)
+    finally:
+        await conn.close()
+
+
+async def main():
+    applied = await migrate_database()
+    if applied:
+        print(f"Applied migrations: {', '.join(map(str, applied))}")
+    else:
+        print("Database schema is up to date")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
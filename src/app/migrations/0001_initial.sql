@@ -0,0 +1,18 @@
+-- Исходная схема (совпадает с init.sql, безопасна для уже созданной БД)
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS links (
+    id SERIAL PRIMARY KEY,
+    original_url TEXT NOT NULL,
+    short_code TEXT UNIQUE NOT NULL,
+    custom_alias TEXT,
+    expires_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    clicks INTEGER DEFAULT 0,
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL
+);
@@ -0,0 +1,15 @@
+-- Индексы под запросы из main.py
+
+-- search_link: WHERE original_url = $1 (только равенство, поэтому hash)
+CREATE INDEX IF NOT EXISTS idx_links_original_url ON links USING hash (original_url);
+
+-- get_expired_links: WHERE expires_at < NOW() ORDER BY expires_at DESC
+CREATE INDEX IF NOT EXISTS idx_links_expires_at ON links (expires_at DESC, id DESC)
+    WHERE expires_at IS NOT NULL;
+
+-- Фоновая очистка: created_at < NOW() - INTERVAL '5 days' AND clicks = 0
+DROP INDEX IF EXISTS idx_links_cleanup;
+CREATE INDEX IF NOT EXISTS idx_links_unused ON links (created_at) WHERE clicks = 0;
+
+-- delete_link / update_link: WHERE short_code = $1 AND user_id = $2
+CREATE INDEX IF NOT EXISTS idx_links_user_short_code ON links (user_id, short_code);
@@ -0,0 +1,59 @@
+import base64
+import json
+import os
+from datetime import date, datetime
+from typing import AsyncIterator, Optional
+
+from src.app.database import get_pool
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "1000"))
+# Сколько строк серверного курсора забирать за один round trip в режиме stream
+STREAM_PREFETCH = int(os.getenv("STREAM_PREFETCH", "500"))
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_cursor(*values) -> str:
+    """Непрозрачный курсор keyset-пагинации из значений ключа сортировки"""
+    raw = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Обратное к encode_cursor; при некорректном курсоре - ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_cursor_timestamp(value) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+async def stream_ndjson(query: str, *args) -> AsyncIterator[bytes]:
+    """Построчно отдает результат запроса как NDJSON через серверный курсор.
+
+    Соединение берется из пула на время выдачи, в памяти держится не больше
+    STREAM_PREFETCH строк независимо от размера результата.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            batch = []
+            async for row in conn.cursor(query, *args, prefetch=STREAM_PREFETCH):
+                batch.append(json.dumps(dict(row), default=_json_default))
+                if len(batch) >= STREAM_PREFETCH:
+                    yield ("\n".join(batch) + "\n").encode()
+                    batch = []
+            if batch:
+                yield ("\n".join(batch) + "\n").encode()
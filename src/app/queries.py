@@ -0,0 +1,146 @@
+"""Реестр именованных SQL-запросов горячего пути.
+
+Каждый запрос подготавливается один раз на соединение пула (хук init пула)
+и дальше выполняется как готовый PreparedStatement. Для каждого запроса
+считаются число вызовов и гистограмма задержек.
+"""
+import time
+import weakref
+from typing import Dict
+
+import asyncpg
+
+from src.app.metrics import Histogram
+
+
+class QueryRegistry:
+    def __init__(self):
+        self._queries: Dict[str, str] = {}
+        # соединение -> {имя запроса: PreparedStatement}
+        self._prepared = weakref.WeakKeyDictionary()
+        self.calls: Dict[str, int] = {}
+        self.latency: Dict[str, Histogram] = {}
+
+    def register(self, name: str, sql: str) -> str:
+        self._queries[name] = sql
+        self.calls[name] = 0
+        self.latency[name] = Histogram()
+        return name
+
+    @property
+    def names(self):
+        return list(self._queries)
+
+    async def prepare_all(self, conn: asyncpg.Connection):
+        """Хук init пула: подготавливает все запросы на новом соединении"""
+        statements = self._prepared.setdefault(conn, {})
+        for name, sql in self._queries.items():
+            try:
+                statements[name] = await conn.prepare(sql)
+            except asyncpg.PostgresError:
+                # Например, таблицы еще нет (миграции не применены) - подготовим при первом вызове
+                pass
+
+    async def _statement(self, conn, name: str, refresh: bool = False):
+        # PoolConnectionProxy живет одну выдачу соединения, ключом служит само соединение
+        raw = getattr(conn, "_con", None) or conn
+        statements = self._prepared.setdefault(raw, {})
+        statement = None if refresh else statements.get(name)
+        if statement is None:
+            statement = statements[name] = await raw.prepare(self._queries[name])
+        return statement
+
+    async def _run(self, conn, name: str, method: str, *args):
+        started = time.perf_counter()
+        try:
+            statement = await self._statement(conn, name)
+            try:
+                return await getattr(statement, method)(*args)
+            except asyncpg.InvalidCachedStatementError:
+                # Схема изменилась после подготовки запроса - готовим заново
+                statement = await self._statement(conn, name, refresh=True)
+                return await getattr(statement, method)(*args)
+        finally:
+            self.calls[name] += 1
+            self.latency[name].observe(time.perf_counter() - started)
+
+    async def fetch(self, conn, name: str, *args):
+        return await self._run(conn, name, "fetch", *args)
+
+    async def fetchrow(self, conn, name: str, *args):
+        return await self._run(conn, name, "fetchrow", *args)
+
+    async def fetchval(self, conn, name: str, *args):
+        return await self._run(conn, name, "fetchval", *args)
+
+    def stats(self) -> dict:
+        return {
+            name: {"calls": self.calls[name], **self.latency[name].snapshot()}
+            for name in self._queries
+        }
+
+
+queries = QueryRegistry()
+
+REDIRECT_LOOKUP = queries.register(
+    "redirect_lookup",
+    "SELECT original_url, expires_at FROM links WHERE short_code = $1"
+)
+LINK_STATS = queries.register(
+    "link_stats",
+    "SELECT * FROM links WHERE short_code = $1"
+)
+LINK_OWNED = queries.register(
+    "link_owned",
+    "SELECT 1 FROM links WHERE short_code = $1 AND user_id = $2"
+)
+INSERT_LINK = queries.register(
+    "insert_link",
+    """
+    INSERT INTO links (
+        original_url,
+        short_code,
+        custom_alias,
+        expires_at,
+        user_id
+    ) VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (short_code) DO NOTHING
+    RETURNING id
+    """
+)
+UPDATE_LINK = queries.register(
+    "update_link",
+    """
+    UPDATE links
+    SET original_url = $1, custom_alias = $2, expires_at = $3
+    WHERE short_code = $4
+    """
+)
+DELETE_LINK = queries.register(
+    "delete_link",
+    "DELETE FROM links WHERE short_code = $1"
+)
+FLUSH_CLICKS = queries.register(
+    "flush_clicks",
+    """
+    UPDATE links SET clicks = links.clicks + d.delta
+    FROM unnest($1::text[], $2::int[]) AS d(short_code, delta)
+    WHERE links.short_code = d.short_code
+    """
+)
+USER_BY_ID = queries.register(
+    "user_by_id",
+    "SELECT id, email, created_at FROM users WHERE id = $1"
+)
+USER_BY_EMAIL = queries.register(
+    "user_by_email",
+    "SELECT * FROM users WHERE email = $1"
+)
+USER_EMAIL_EXISTS = queries.register(
+    "user_email_exists",
+    "SELECT 1 FROM users WHERE email = $1"
+)
+INSERT_USER = queries.register(
+    "insert_user",
+    "INSERT INTO users (email, password_hash, created_at) VALUES ($1, $2, $3)"
+)
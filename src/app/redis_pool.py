@@ -0,0 +1,41 @@
+import os
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+_client: Optional[aioredis.Redis] = None
+_checked = False
+
+
+async def get_redis() -> Optional[aioredis.Redis]:
+    """Возвращает общий async-клиент Redis (с пулом соединений) или None, если Redis недоступен"""
+    global _client, _checked
+    if _checked:
+        return _client
+    _checked = True
+
+    client = aioredis.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_connect_timeout=1,
+    )
+    try:
+        await client.ping()
+    except (aioredis.ConnectionError, aioredis.TimeoutError, OSError):
+        await client.close()
+        print("Warning: Redis is not available. Using in-process storage only.")
+        return None
+
+    _client = client
+    return _client
+
+
+async def close_redis():
+    global _client, _checked
+    client, _client = _client, None
+    _checked = False
+    if client is not None:
+        await client.close()
@@ -0,0 +1,60 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Сколько операций может ждать свободного потока, прежде чем отвечать 429
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+
+
+class HasherBusy(Exception):
+    """Очередь хеширования паролей заполнена"""
+
+
+class PasswordHasher:
+    """Выполняет bcrypt-хеширование и проверку паролей в пуле потоков.
+
+    bcrypt отпускает GIL на время вычисления, поэтому потоки дают настоящий
+    параллелизм, а event loop продолжает обслуживать редиректы. Число
+    одновременно ожидающих операций ограничено: при переполнении - HasherBusy.
+    """
+
+    def __init__(
+        self,
+        context: CryptContext,
+        workers: int = PASSWORD_HASH_WORKERS,
+        queue_size: int = PASSWORD_HASH_QUEUE_SIZE,
+    ):
+        self.context = context
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    async def _run(self, func, *args):
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise HasherBusy()
+        self.pending += 1
+        try:
+            return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(self.context.verify, password, password_hash)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": min(self.pending, self.workers),
+            "queued": max(0, self.pending - self.workers),
+            "queue_size": self.queue_size,
+            "rejected": self.rejected,
+        }
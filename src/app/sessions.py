@@ -0,0 +1,65 @@
+import os
+import uuid
+from typing import Optional
+
+from src.app.cache import TTLCache
+
+SESSION_TTL = int(os.getenv("SESSION_TTL", "86400"))
+# Локальный кеш session_id -> пользователь; после logout на другом воркере
+# запись может прожить еще не более SESSION_CACHE_TTL секунд
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "10"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+# Размер in-memory хранилища сессий, когда Redis недоступен
+LOCAL_SESSIONS_MAX_SIZE = int(os.getenv("LOCAL_SESSIONS_MAX_SIZE", "100000"))
+
+
+class SessionStore:
+    """Хранилище сессий в Redis (redis.asyncio) с in-memory fallback.
+
+    Без Redis сессии живут в ограниченном по размеру словаре с истечением
+    через SESSION_TTL. Поверх любого бэкенда держится короткоживущий кеш
+    данных пользователя, чтобы повторные запросы не ходили ни в Redis, ни в БД.
+    """
+
+    def __init__(
+        self,
+        redis=None,
+        ttl: int = SESSION_TTL,
+        cache_ttl: float = SESSION_CACHE_TTL,
+        cache_size: int = SESSION_CACHE_SIZE,
+        local_max_size: int = LOCAL_SESSIONS_MAX_SIZE,
+        prefix: str = "session:",
+    ):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self.local_sessions = TTLCache(local_max_size, ttl)
+        self.user_cache = TTLCache(cache_size, cache_ttl)
+
+    async def create(self, user_id: int) -> str:
+        session_id = str(uuid.uuid4())
+        if self.redis is not None:
+            await self.redis.set(self.prefix + session_id, user_id, ex=self.ttl)
+        else:
+            self.local_sessions.set(session_id, user_id)
+        return session_id
+
+    async def get_user_id(self, session_id: str) -> Optional[int]:
+        if self.redis is not None:
+            user_id = await self.redis.get(self.prefix + session_id)
+        else:
+            user_id = self.local_sessions.get(session_id)
+        return int(user_id) if user_id else None
+
+    async def delete(self, session_id: str):
+        self.user_cache.pop(session_id)
+        if self.redis is not None:
+            await self.redis.delete(self.prefix + session_id)
+        else:
+            self.local_sessions.pop(session_id)
+
+    def cached_user(self, session_id: str) -> Optional[dict]:
+        return self.user_cache.get(session_id)
+
+    def cache_user(self, session_id: str, user: dict):
+        self.user_cache.set(session_id, user)
@@ -0,0 +1,106 @@
+import os
+import secrets
+from datetime import datetime
+from typing import Optional
+
+import asyncpg
+
+from src.app.queries import queries, INSERT_LINK
+
+# Длина генерируемого кода задается в байтах энтропии (token_urlsafe(6) -> 8 символов)
+SHORT_CODE_MIN_BYTES = int(os.getenv("SHORT_CODE_MIN_BYTES", "6"))
+SHORT_CODE_MAX_BYTES = int(os.getenv("SHORT_CODE_MAX_BYTES", "12"))
+SHORT_CODE_MAX_ATTEMPTS = int(os.getenv("SHORT_CODE_MAX_ATTEMPTS", "5"))
+# Доля коллизий в окне, после которой длина кода увеличивается
+SHORT_CODE_GROW_THRESHOLD = float(os.getenv("SHORT_CODE_GROW_THRESHOLD", "0.01"))
+SHORT_CODE_WINDOW = int(os.getenv("SHORT_CODE_WINDOW", "1000"))
+
+
+class AliasTaken(Exception):
+    """Пользовательский алиас уже занят"""
+
+
+class ShortCodeExhausted(Exception):
+    """Не удалось подобрать свободный код за отведенное число попыток"""
+
+
+class ShortCodeAllocator:
+    """Выделяет короткие коды одним INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    Для сгенерированных кодов при конфликте делается новая попытка (не более
+    max_attempts). Доля коллизий считается в скользящем окне; если она
+    превышает порог, длина новых кодов увеличивается на байт.
+    """
+
+    def __init__(
+        self,
+        min_bytes: int = SHORT_CODE_MIN_BYTES,
+        max_bytes: int = SHORT_CODE_MAX_BYTES,
+        max_attempts: int = SHORT_CODE_MAX_ATTEMPTS,
+        grow_threshold: float = SHORT_CODE_GROW_THRESHOLD,
+        window: int = SHORT_CODE_WINDOW,
+    ):
+        self.nbytes = min_bytes
+        self.max_bytes = max_bytes
+        self.max_attempts = max_attempts
+        self.grow_threshold = grow_threshold
+        self.window = window
+        self.attempts = 0
+        self.collisions = 0
+        self.exhausted = 0
+        self._window_attempts = 0
+        self._window_collisions = 0
+
+    def generate(self) -> str:
+        return secrets.token_urlsafe(self.nbytes)
+
+    def record(self, collided: bool):
+        """Учитывает результат попытки и при необходимости удлиняет коды"""
+        self.attempts += 1
+        self._window_attempts += 1
+        if collided:
+            self.collisions += 1
+            self._window_collisions += 1
+        if self._window_attempts >= self.window:
+            if (self._window_collisions / self._window_attempts > self.grow_threshold
+                    and self.nbytes < self.max_bytes):
+                self.nbytes += 1
+            self._window_attempts = 0
+            self._window_collisions = 0
+
+    async def insert(
+        self,
+        conn: asyncpg.Connection,
+        original_url: str,
+        custom_alias: Optional[str],
+        expires_at: Optional[datetime],
+        user_id: Optional[int],
+    ) -> str:
+        """Вставляет ссылку и возвращает ее короткий код"""
+        if custom_alias:
+            inserted = await queries.fetchval(
+                conn, INSERT_LINK, original_url, custom_alias, custom_alias, expires_at, user_id
+            )
+            if inserted is None:
+                raise AliasTaken(custom_alias)
+            return custom_alias
+
+        for _ in range(self.max_attempts):
+            short_code = self.generate()
+            inserted = await queries.fetchval(
+                conn, INSERT_LINK, original_url, short_code, None, expires_at, user_id
+            )
+            self.record(inserted is None)
+            if inserted is not None:
+                return short_code
+        self.exhausted += 1
+        raise ShortCodeExhausted()
+
+    def stats(self) -> dict:
+        return {
+            "code_bytes": self.nbytes,
+            "attempts": self.attempts,
+            "collisions": self.collisions,
+            "collision_rate": self.collisions / self.attempts if self.attempts else 0.0,
+            "exhausted": self.exhausted,
+        }
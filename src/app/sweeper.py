@@ -0,0 +1,104 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Iterable, Optional
+
+import asyncpg
+
+from src.app.database import get_pool
+
+CLEANUP_INTERVAL = float(os.getenv("CLEANUP_INTERVAL", "3600"))
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", "1000"))
+# Ключ advisory-блокировки: очистку одновременно выполняет только один процесс
+CLEANUP_LOCK_KEY = int(os.getenv("CLEANUP_LOCK_KEY", "5501"))
+
+DELETE_UNUSED_BATCH_SQL = """
+    DELETE FROM links WHERE ctid = ANY(ARRAY(
+        SELECT ctid FROM links
+        WHERE created_at < NOW() - INTERVAL '5 days' AND clicks = 0
+        LIMIT $1
+    ))
+    RETURNING short_code
+"""
+
+
+# метод для очистки неиспользованных ссылок, которые заведены более чем 5 дней назад и имеюю 0 кликов (0 редиректов)
+async def cleanup_unused_links(conn: asyncpg.Connection, batch_size: int = CLEANUP_BATCH_SIZE) -> list:
+    """Удаляет ссылки, созданные более 5 дней назад с 0 кликов, пакетами по batch_size строк.
+
+    Каждый пакет - отдельный короткий DELETE, поэтому блокировки строк не
+    держатся на время всей очистки. Возвращает удаленные короткие коды.
+    """
+    deleted = []
+    while True:
+        rows = await conn.fetch(DELETE_UNUSED_BATCH_SQL, batch_size)
+        deleted.extend(row["short_code"] for row in rows)
+        if len(rows) < batch_size:
+            return deleted
+
+
+class CleanupSweeper:
+    """Периодическая фоновая очистка неиспользованных ссылок.
+
+    before_run вызывается перед каждым проходом (например, чтобы записать
+    в БД буфер кликов), on_deleted получает удаленные коды (инвалидация кеша).
+    """
+
+    def __init__(
+        self,
+        interval: float = CLEANUP_INTERVAL,
+        batch_size: int = CLEANUP_BATCH_SIZE,
+        lock_key: int = CLEANUP_LOCK_KEY,
+        before_run: Optional[Callable[[], Awaitable]] = None,
+        on_deleted: Optional[Callable[[Iterable[str]], Awaitable]] = None,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lock_key = lock_key
+        self.before_run = before_run
+        self.on_deleted = on_deleted
+        self.last_run: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> dict:
+        """Один проход очистки; пропускается, если его уже выполняет другой процесс"""
+        started = time.monotonic()
+        if self.before_run is not None:
+            await self.before_run()
+
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", self.lock_key):
+                self.last_run = {"skipped": True, "deleted": 0, "duration": time.monotonic() - started}
+                return self.last_run
+            try:
+                deleted = await cleanup_unused_links(conn, self.batch_size)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", self.lock_key)
+
+        if deleted and self.on_deleted is not None:
+            await self.on_deleted(deleted)
+        self.last_run = {"skipped": False, "deleted": len(deleted), "duration": time.monotonic() - started}
+        print(f"Cleanup: deleted {self.last_run['deleted']} unused links in {self.last_run['duration']:.3f}s")
+        return self.last_run
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Cleanup failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -6,6 +6,7 @@ import logging
 from httpx import AsyncClient
 from fastapi.testclient import TestClient
 from src.app.main import app
+from src.app.migrate import apply_migrations
 import asyncpg
 from passlib.context import CryptContext
 
@@ -32,27 +33,10 @@ async def db_pool():
         max_size=10
     )
     
-    # Инициализация тестовой БД
+    # Инициализация тестовой БД: схема создается теми же миграциями, что и в продакшене
     async with pool.acquire() as conn:
-        await conn.execute("""
-            DROP TABLE IF EXISTS links, users CASCADE;
-            CREATE TABLE users (
-                id SERIAL PRIMARY KEY,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-            CREATE TABLE links (
-                id SERIAL PRIMARY KEY,
-                original_url TEXT NOT NULL,
-                short_code TEXT UNIQUE NOT NULL,
-                custom_alias TEXT,
-                expires_at TIMESTAMP,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                clicks INTEGER DEFAULT 0
-            );
-        """)
+        await conn.execute("DROP TABLE IF EXISTS links, users, schema_migrations CASCADE")
+        await apply_migrations(conn)
     
     yield pool
     
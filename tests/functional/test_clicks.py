@@ -0,0 +1,31 @@
+import pytest
+from src.app.clicks import ClickCounter
+
+
+@pytest.mark.asyncio
+async def test_click_counter_flushes_batched_deltas(db_connection):
+    """Накопленные клики записываются в БД одним пакетом и учитываются до записи"""
+    await db_connection.execute(
+        "INSERT INTO links (original_url, short_code) VALUES ('https://a.test', 'ca'), ('https://b.test', 'cb')"
+    )
+    counter = ClickCounter(flush_interval=60, max_size=100)
+    for _ in range(3):
+        counter.add("ca")
+    counter.add("cb")
+    assert counter.pending("ca") == 3
+
+    assert await counter.flush() == 2
+    assert counter.pending("ca") == 0
+    rows = await db_connection.fetch("SELECT short_code, clicks FROM links ORDER BY short_code")
+    assert [(r["short_code"], r["clicks"]) for r in rows] == [("ca", 3), ("cb", 1)]
+
+
+@pytest.mark.asyncio
+async def test_click_counter_drains_on_stop(db_connection):
+    """При остановке незаписанные клики сбрасываются в БД"""
+    await db_connection.execute("INSERT INTO links (original_url, short_code) VALUES ('https://a.test', 'cs')")
+    counter = ClickCounter(flush_interval=60, max_size=100)
+    counter.start()
+    counter.add("cs", 5)
+    await counter.stop()
+    assert await db_connection.fetchval("SELECT clicks FROM links WHERE short_code = 'cs'") == 5
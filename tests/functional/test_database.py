@@ -6,9 +6,23 @@ from fastapi import status
 async def test_redis_fallback(async_client, test_user, monkeypatch):
     """Тест работы fallback при недоступности Redis"""
     # Эмулируем недоступность Redis
-    monkeypatch.setattr("src.app.main.redis_client", None)
+    monkeypatch.setattr("src.app.main.session_store.redis", None)
     
     # Проверяем работу аутентификации
     response = await async_client.get("/me", cookies=test_user["cookies"])
     assert response.status_code == status.HTTP_200_OK
 
+
+@pytest.mark.asyncio
+async def test_connections_returned_to_pool(async_client):
+    """Соединения из пула возвращаются после каждого запроса"""
+    from src.app.database import pool_stats
+
+    for _ in range(5):
+        response = await async_client.get("/links/nonexistent/stats")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    stats = pool_stats()
+    assert stats["initialized"]
+    assert stats["in_use"] == 0
+    assert stats["size"] <= stats["max_size"]
@@ -25,4 +25,29 @@ async def test_delete_link(async_client, test_user):
     
     # Проверяем что ссылка удалена
     stats_res = await async_client.get("/links/todelete/stats", cookies=test_user["cookies"])
-    assert stats_res.status_code == status.HTTP_404_NOT_FOUND
\ No newline at end of file
+    assert stats_res.status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.asyncio
+async def test_update_invalidates_redirect_cache(async_client, test_user):
+    """После обновления ссылки редирект ведет на новый адрес, а не на закешированный"""
+    await async_client.post(
+        "/links/shorten",
+        json={"original_url": "https://old.example.com", "custom_alias": "cached"},
+        cookies=test_user["cookies"]
+    )
+    first = await async_client.get("/cached", follow_redirects=False)
+    assert first.headers["location"] == "https://old.example.com"
+
+    update_res = await async_client.put(
+        "/links/cached",
+        json={"original_url": "https://new.example.com"},
+        cookies=test_user["cookies"]
+    )
+    assert update_res.status_code == status.HTTP_200_OK
+
+    second = await async_client.get("/cached", follow_redirects=False)
+    assert second.headers["location"] == "https://new.example.com"
+
+    await async_client.delete("/links/cached", cookies=test_user["cookies"])
+    gone = await async_client.get("/cached", follow_redirects=False)
+    assert gone.status_code == status.HTTP_404_NOT_FOUND
@@ -2,6 +2,7 @@ import pytest
 from datetime import datetime, timedelta
 from fastapi import status
 import uuid
+import json
 
 @pytest.mark.asyncio
 async def test_create_short_link(async_client, test_user):
@@ -155,3 +156,38 @@ async def test_get_expired_links(async_client, test_user):
     assert isinstance(response.json(), list)
     assert len(response.json()) > 0
     assert "expires_at" in response.json()[0]
+
+@pytest.mark.asyncio
+async def test_bulk_shorten(async_client, test_user):
+    """Массовое создание ссылок: JSON-массив и NDJSON, результаты по каждому элементу"""
+    response = await async_client.post(
+        "/links/shorten/bulk",
+        json=[
+            {"original_url": "example.com"},
+            {"original_url": "invalid url"},
+            {"original_url": "https://bulk.example.com", "custom_alias": "bulkalias"},
+            {"original_url": "https://other.example.com", "custom_alias": "bulkalias"},
+        ],
+        cookies=test_user["cookies"]
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "application/x-ndjson" in response.headers["content-type"]
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert "short_code" in results[0]
+    assert results[1]["error"] == "Invalid URL"
+    assert results[2]["short_code"] == "bulkalias"
+    assert results[3]["error"] == "Alias already exists"
+
+    redirect = await async_client.get("/bulkalias", follow_redirects=False)
+    assert redirect.headers["location"] == "https://bulk.example.com"
+
+    ndjson = "\n".join(json.dumps({"original_url": f"https://nd{i}.example.com"}) for i in range(3))
+    response = await async_client.post(
+        "/links/shorten/bulk",
+        content=ndjson,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert len(results) == 3
+    assert all("short_code" in r for r in results)
@@ -0,0 +1,26 @@
+import pytest
+from src.app.migrate import apply_migrations, load_migrations
+
+
+@pytest.mark.asyncio
+async def test_migrations_are_applied_once(db_connection):
+    """Повторный запуск не применяет миграции заново"""
+    assert await apply_migrations(db_connection) == []
+    versions = [row["version"] for row in await db_connection.fetch(
+        "SELECT version FROM schema_migrations ORDER BY version"
+    )]
+    assert versions == [version for version, _, _ in load_migrations()]
+
+
+@pytest.mark.asyncio
+async def test_query_indexes_exist(db_connection):
+    """Для запросов из main.py созданы индексы"""
+    indexes = {row["indexname"] for row in await db_connection.fetch(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'links'"
+    )}
+    assert {
+        "idx_links_original_url",
+        "idx_links_expires_at",
+        "idx_links_unused",
+        "idx_links_user_short_code",
+    } <= indexes
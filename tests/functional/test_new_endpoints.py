@@ -1,6 +1,7 @@
 import pytest
 from datetime import datetime, timedelta
 from fastapi import status
+import json
 
 @pytest.mark.asyncio
 async def test_get_expired_links(test_user, db_connection):
@@ -76,3 +77,52 @@ async def test_browser_redirect(test_user):
         assert "https://browser.test" in redirect_response.text
     else:
         assert redirect_response.headers["location"] == "https://browser.test"
+
+@pytest.mark.asyncio
+async def test_expired_links_keyset_pagination(async_client, db_connection):
+    """Постраничная выдача истекших ссылок по курсору и потоковый режим"""
+    await db_connection.execute("""
+        INSERT INTO links (original_url, short_code, expires_at)
+        SELECT 'https://exp.test', 'exp' || g, NOW() - g * INTERVAL '1 hour'
+        FROM generate_series(1, 5) g
+    """)
+
+    codes = []
+    after = None
+    while True:
+        params = {"limit": 2}
+        if after:
+            params["after"] = after
+        response = await async_client.get("/links/expired", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        codes.extend(link["short_code"] for link in response.json())
+        after = response.headers.get("x-next-cursor")
+        if not after:
+            break
+    assert codes == [f"exp{i}" for i in range(1, 6)]
+
+    streamed = await async_client.get("/links/expired", params={"stream": "true"})
+    assert "application/x-ndjson" in streamed.headers["content-type"]
+    assert [json.loads(line)["short_code"] for line in streamed.text.splitlines()] == codes
+
+    bad = await async_client.get("/links/expired", params={"after": "garbage"})
+    assert bad.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_search_pagination(async_client, db_connection):
+    """Поиск по URL с курсором"""
+    await db_connection.execute("""
+        INSERT INTO links (original_url, short_code)
+        SELECT 'https://same.test', 'same' || g FROM generate_series(1, 3) g
+    """)
+    first = await async_client.get("/links/search", params={"original_url": "https://same.test", "limit": 2})
+    assert [link["short_code"] for link in first.json()] == ["same1", "same2"]
+
+    second = await async_client.get("/links/search", params={
+        "original_url": "https://same.test",
+        "limit": 2,
+        "after": first.headers["x-next-cursor"]
+    })
+    assert [link["short_code"] for link in second.json()] == ["same3"]
+    assert "x-next-cursor" not in second.headers
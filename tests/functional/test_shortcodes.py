@@ -0,0 +1,40 @@
+import pytest
+from src.app.shortcodes import ShortCodeAllocator, AliasTaken, ShortCodeExhausted
+
+
+@pytest.mark.asyncio
+async def test_allocator_retries_generated_codes_on_collision(db_connection):
+    """При коллизии сгенерированного кода делается новая попытка"""
+    await db_connection.execute("INSERT INTO links (original_url, short_code) VALUES ('https://a.test', 'taken')")
+    allocator = ShortCodeAllocator(max_attempts=3)
+    codes = iter(["taken", "free"])
+    allocator.generate = lambda: next(codes)
+
+    short_code = await allocator.insert(db_connection, "https://b.test", None, None, None)
+
+    assert short_code == "free"
+    assert allocator.stats()["attempts"] == 2
+    assert allocator.stats()["collisions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_allocator_custom_alias_and_exhaustion(db_connection):
+    """Занятый алиас не перегенерируется; число попыток ограничено"""
+    await db_connection.execute("INSERT INTO links (original_url, short_code) VALUES ('https://a.test', 'taken')")
+    allocator = ShortCodeAllocator(max_attempts=2)
+    with pytest.raises(AliasTaken):
+        await allocator.insert(db_connection, "https://b.test", "taken", None, None)
+
+    allocator.generate = lambda: "taken"
+    with pytest.raises(ShortCodeExhausted):
+        await allocator.insert(db_connection, "https://b.test", None, None, None)
+    assert allocator.exhausted == 1
+
+
+def test_allocator_grows_code_length_when_keyspace_is_crowded():
+    """Высокая доля коллизий в окне увеличивает длину кода"""
+    allocator = ShortCodeAllocator(min_bytes=6, window=10, grow_threshold=0.1)
+    for collided in [True, True] + [False] * 8:
+        allocator.record(collided)
+    assert allocator.nbytes == 7
+    assert len(allocator.generate()) > 8
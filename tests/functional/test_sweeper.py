@@ -0,0 +1,41 @@
+import pytest
+from src.app.sweeper import CleanupSweeper
+
+
+@pytest.mark.asyncio
+async def test_sweeper_deletes_unused_links_in_batches(db_connection):
+    """Удаляются только старые ссылки без кликов, пакетами"""
+    await db_connection.execute("""
+        INSERT INTO links (original_url, short_code, created_at, clicks)
+        SELECT 'https://old.test', 'old' || g, NOW() - INTERVAL '6 days', 0 FROM generate_series(1, 5) g
+    """)
+    await db_connection.execute("""
+        INSERT INTO links (original_url, short_code, created_at, clicks) VALUES
+            ('https://clicked.test', 'clicked', NOW() - INTERVAL '6 days', 3),
+            ('https://fresh.test', 'fresh', NOW(), 0)
+    """)
+    deleted_codes = []
+
+    async def on_deleted(codes):
+        deleted_codes.extend(codes)
+
+    sweeper = CleanupSweeper(batch_size=2, on_deleted=on_deleted)
+    result = await sweeper.run_once()
+
+    assert result["deleted"] == 5
+    assert not result["skipped"]
+    assert sorted(deleted_codes) == [f"old{i}" for i in range(1, 6)]
+    remaining = await db_connection.fetch("SELECT short_code FROM links ORDER BY short_code")
+    assert [r["short_code"] for r in remaining] == ["clicked", "fresh"]
+
+
+@pytest.mark.asyncio
+async def test_sweeper_skips_when_lock_is_held(db_connection):
+    """Если очистку уже выполняет другой процесс, проход пропускается"""
+    sweeper = CleanupSweeper()
+    await db_connection.execute("SELECT pg_advisory_lock($1)", sweeper.lock_key)
+    try:
+        result = await sweeper.run_once()
+    finally:
+        await db_connection.execute("SELECT pg_advisory_unlock($1)", sweeper.lock_key)
+    assert result["skipped"]
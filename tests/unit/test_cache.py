@@ -0,0 +1,34 @@
+import pytest
+from src.app.cache import TTLCache, RedirectCache, CachedLink, NOT_FOUND
+
+
+def test_ttl_cache_lru_and_expiry():
+    """LRU-вытеснение и истечение TTL"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" становится самым свежим
+    cache.set("c", 3)           # вытесняется "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.set("short", 4, ttl=-1)
+    assert cache.get("short") is None
+    assert "short" not in cache
+
+
+@pytest.mark.asyncio
+async def test_redirect_cache_hit_miss_and_invalidate():
+    """Положительные и отрицательные записи, инвалидация"""
+    cache = RedirectCache(maxsize=10, ttl=60, negative_ttl=60)
+    assert await cache.get("abc") is None
+
+    await cache.set("abc", CachedLink("https://example.com", None))
+    assert (await cache.get("abc")).target_url == "https://example.com"
+
+    await cache.set_missing("nope")
+    assert await cache.get("nope") is NOT_FOUND
+
+    await cache.invalidate("abc")
+    assert await cache.get("abc") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "negative_hits": 1, "misses": 2}
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+import pytest
+from passlib.context import CryptContext
+from src.app.security import PasswordHasher, HasherBusy
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_roundtrip():
+    """Хеширование и проверка пароля в пуле потоков"""
+    hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], deprecated="auto"), workers=1, queue_size=1)
+    password_hash = await hasher.hash("secret")
+    assert await hasher.verify("secret", password_hash)
+    assert not await hasher.verify("wrong", password_hash)
+    assert hasher.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_queue_is_full():
+    """При заполненной очереди новые операции отклоняются"""
+    release = threading.Event()
+
+    class SlowContext:
+        def hash(self, password):
+            release.wait(5)
+            return password
+
+    hasher = PasswordHasher(SlowContext(), workers=1, queue_size=1)
+    running = [asyncio.ensure_future(hasher.hash("a")), asyncio.ensure_future(hasher.hash("b"))]
+    await asyncio.sleep(0)
+    assert hasher.stats()["queued"] == 1
+
+    with pytest.raises(HasherBusy):
+        await hasher.hash("c")
+    assert hasher.rejected == 1
+
+    release.set()
+    assert await asyncio.gather(*running) == ["a", "b"]
@@ -0,0 +1,32 @@
+import pytest
+from src.app.sessions import SessionStore
+
+
+@pytest.mark.asyncio
+async def test_local_session_store_is_bounded_and_expiring():
+    """Без Redis сессии хранятся в ограниченном словаре с истечением"""
+    store = SessionStore(redis=None, ttl=60, local_max_size=2)
+    first = await store.create(1)
+    second = await store.create(2)
+    assert await store.get_user_id(first) == 1
+
+    await store.create(3)  # вытесняет самую старую по использованию сессию
+    assert await store.get_user_id(second) is None
+    assert await store.get_user_id(first) == 1
+
+    expired = SessionStore(redis=None, ttl=-1)
+    session_id = await expired.create(1)
+    assert await expired.get_user_id(session_id) is None
+
+
+@pytest.mark.asyncio
+async def test_logout_invalidates_cached_user():
+    """Удаление сессии сбрасывает закешированного пользователя"""
+    store = SessionStore(redis=None)
+    session_id = await store.create(7)
+    store.cache_user(session_id, {"id": 7})
+    assert store.cached_user(session_id) == {"id": 7}
+
+    await store.delete(session_id)
+    assert store.cached_user(session_id) is None
+    assert await store.get_user_id(session_id) is None